@@ -0,0 +1,30 @@
+import os
+import diskcache
+
+
+def _cache_root():
+    """
+    Per-user directory for the caches, outside the source tree. Cached entries hold
+    private Slack files and analyses of internal architectures.
+
+    Read when a cache is opened, so CACHE_DIR set through .env is honoured.
+    """
+    return os.path.expanduser(os.environ.get("CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or "~/.cache", "secarchbot"
+    ))
+
+
+def open_cache(env_var, name):
+    """
+    Open a diskcache.Cache in the directory named by env_var, defaulting to
+    <CACHE_DIR>/name, and restrict the directory to the owner
+    """
+    directory = os.path.expanduser(os.environ.get(env_var, ""))
+    if not directory:
+        root = _cache_root()
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        directory = os.path.join(root, name)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # makedirs leaves existing directories, and the parents it creates, as they were
+    os.chmod(directory, 0o700)
+    return diskcache.Cache(directory)
@@ -1,15 +1,38 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from logger import logger  # Import the centralized logger
+from rate_limiter import RateLimiter
+
+_rate_limiter = RateLimiter.from_env("eraser", 4, 60)
 
 class EraserAPI:
     def __init__(self, api_token: str):
         self.api_token = api_token
         self.headers = {
             "Authorization": f"Bearer {api_token}",
-            "Accept": "application/json",
+            "Accept": "image/png, application/json",
             "Content-Type": "application/json"
         }
 
+        # Pooled session so repeated diagram generations reuse the HTTPS connection.
+        # urllib3 retries connection errors and 5xx responses with exponential
+        # backoff (1s, 2s, 4s), honouring Retry-After when the server sends it.
+        # Read timeouts are not retried: generation may still be running and
+        # billed, and another 180s wait would hold the rate limiter slot.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retries = Retry(
+            total=3,
+            read=0,
+            status_forcelist=(500, 502, 503, 504),
+            backoff_factor=1.0,
+            respect_retry_after_header=True,
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retries))
+
     def generate_diagram_from_prompt(self, prompt: str) -> dict:
         """
         Generate a diagram using Eraser's AI diagram generation endpoint.
@@ -18,7 +41,8 @@ class EraserAPI:
             prompt (str): The text description of the diagram to generate
             
         Returns:
-            dict: The response from Eraser's API containing the diagram data
+            dict: {'bytes': ...} when Eraser returns the image inline,
+                otherwise {'url': ...} pointing at the rendered image
         """
         endpoint = "https://app.eraser.io/api/render/prompt"
         
@@ -26,6 +50,7 @@ class EraserAPI:
         payload = {
             "text": prompt,  # Required field
             "type": "architecture",  # Specify diagram type
+            "returnFile": True,  # Ask for the image inline to skip a second download
             "options": {
                 "theme": "light",
                 "format": "png",
@@ -42,27 +67,15 @@ class EraserAPI:
         }
         
         try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=payload,
-                timeout=180  # Increased timeout for diagram generation
-            )
-
-            logger.debug(f"Eraser API request sent to {endpoint}. Status Code: {response.status_code}") # Use logger
-
-            # Add retries for timeouts
-            retries = 3
-            while retries > 0 and response.status_code >= 500:
-                logger.warning(f"Eraser API returned {response.status_code}. Retrying request... {retries} attempts left") # Use logger
-                response = requests.post(
+            with _rate_limiter:
+                response = self.session.post(
                     endpoint,
-                    headers=self.headers,
                     json=payload,
-                    timeout=180
+                    timeout=180  # Increased timeout for diagram generation
                 )
-                retries -= 1
-            
+
+            logger.debug(f"Eraser API request sent to {endpoint}. Status Code: {response.status_code}") # Use logger
+
             # Handle specific error cases after retries
             if response.status_code == 400:
                 error_msg = response.text
@@ -78,6 +91,11 @@ class EraserAPI:
             # Raise HTTPError for other bad responses (4xx or 5xx) after retries
             response.raise_for_status()
 
+            # Image returned inline, no separate download needed
+            if response.headers.get("Content-Type", "").startswith("image/"):
+                logger.info(f"Successfully generated diagram. Received {len(response.content)} bytes inline")
+                return {'bytes': response.content}
+
             # Try to parse JSON response
             try:
                 json_response = response.json()
@@ -1,18 +1,239 @@
 import io
-import pytesseract
-from PIL import Image
+import hashlib
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import os
-from google import genai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import sys
 from logger import logger # Import the centralized logger
+from rate_limiter import RateLimiter
+from cache import open_cache
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Bump when the prompt, model or output formatting changes to invalidate cached analyses
+CACHE_VERSION = "v2"
+CACHE_EXPIRE_SECONDS = 30 * 86400
+
+# Sent with every Gemini request; set GEMINI_PROMPT_FILE to override without a code change
+_GEMINI_ANALYSIS_PROMPT = '''\
+"Act as a Security Analyst specializing in Zero Trust Architecture. Your first task is to meticulously analyze the provided architecture diagram. Provide an **extremely detailed description and inventory** of all components, connections, and zones. As you describe each element, **immediately identify and note any aspects that appear potentially problematic or misaligned with core Zero Trust principles** ('never trust, always verify', least privilege, assume breach, micro-segmentation, explicit verification).
+
+**Do not provide comprehensive solutions or recommendations yet.** Focus on description combined with flagging initial Zero Trust concerns based *only* on the visual evidence. Structure your analysis like this:
+
+1.  **Overall System Context:** Briefly describe the likely purpose/type of system shown.
+2.  **Component Inventory & Initial ZT Notes:** List *every* identifiable component (servers, databases, firewalls, load balancers, user endpoints, cloud services, APIs, etc.). For each:
+    * Identify its type and likely function.
+    * Describe its *implied security role or context*.
+    * **Initial ZT Observation:** Note if its placement, connections, or nature raises potential Zero Trust concerns (e.g., 'Database: Located in a broad 'internal' zone, potentially accessible by multiple services without apparent granular controls, raising concerns about least privilege.', 'Web Server: Public-facing, standard component. Note if connections bypass expected security controls like a WAF if one isn't shown.').
+3.  **Connections, Flows, & Initial ZT Notes:** Describe all visible connections and data flow paths (mention direction if possible).
+    * **Initial ZT Observation:** Note if flows imply excessive trust, lack obvious verification points, or cross boundaries without clear mediation (e.g., 'Flow - App Server to Database: Direct connection within the same zone shown. This might represent implicit trust; verification mechanism unclear from diagram.', 'Flow - User to Web Server: Appears to go through perimeter firewall only. Need to later verify if additional layers like WAF, authentication exist.').
+4.  **Boundaries, Zones, & Initial ZT Notes:** Identify visual or implied zones (DMZ, Internal, Trusted, Untrusted, VPCs, Subnets). Describe their apparent purpose.
+    * **Initial ZT Observation:** Note if zones seem overly large ('flat network'), suggesting significant implicit trust and potential for lateral movement, contrary to micro-segmentation goals. Note lack of internal segmentation if apparent (e.g., 'Internal Zone: Appears monolithic, containing diverse services. Lack of internal segmentation could be a key Zero Trust gap.').
+5.  **Summary of Potential ZT Gaps:** Briefly list the 2-4 most prominent potential Zero Trust issues flagged during the description (e.g., 'Apparent large implicit trust zones', 'Lack of visible internal segmentation', 'Unclear verification points for internal service communication')."'''
+if os.getenv("GEMINI_PROMPT_FILE"):
+    with open(os.environ["GEMINI_PROMPT_FILE"], encoding="utf-8") as prompt_file:
+        _GEMINI_ANALYSIS_PROMPT = prompt_file.read().strip()
+PROMPT_HASH = hashlib.sha256(_GEMINI_ANALYSIS_PROMPT.encode()).hexdigest()
+
+# Persistent cache of image analyses keyed by image content hash
+_analysis_cache = open_cache("IMAGE_CACHE_DIR", "gemini")
+# Downloaded images with their ETag/Last-Modified validators, keyed by URL
+_download_cache = open_cache("DOWNLOAD_CACHE_DIR", "download")
+
+DOWNLOAD_TIMEOUT_SECONDS = 60
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Shared session so back-to-back image downloads reuse pooled connections. The
+# per-host pool must be at least as large as the number of parallel downloads,
+# otherwise urllib3 discards the surplus connections and the next event pays
+# for fresh TCP+TLS handshakes.
+DOWNLOAD_POOL_SIZE = int(os.getenv("DOWNLOAD_POOL_SIZE", "16"))
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_POOL_SIZE))
+
+# Tesseract settings: LSTM engine, treat the image as a single block of text
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+# Small diagrams are upscaled before OCR so glyphs are large enough to recognize
+OCR_MIN_WIDTH = 1000
+# Skew corrections larger than this are assumed to be layout, not scan skew
+OCR_MAX_DESKEW_DEGREES = 10
+# Images larger than this are split into horizontal strips and OCR'd in parallel
+OCR_TILE_MIN_PIXELS = 1_000_000
+# Strips shorter than this start cutting through lines of text
+OCR_MIN_STRIP_HEIGHT = 200
+# CPUs this process may run on, which respects container CPU sets
+OCR_CPU_COUNT = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+# Batch jobs can take up to 24h, so poll sparingly
+BATCH_POLL_INTERVAL_SECONDS = 30
+BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED", "JOB_STATE_FAILED",
+                     "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+# Per-request errors in a partially succeeded job are reported in its responses
+BATCH_SUCCESS_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+# The service expires jobs after 48h; stop polling shortly after that
+BATCH_MAX_WAIT_SECONDS = 49 * 3600
+
+# Gemini client is built on first use and shared so its HTTP connection is reused
+_GEMINI_CLIENT = None
+_gemini_client_lock = threading.Lock()
+_gemini_rate_limiter = RateLimiter.from_env("gemini", 8, 1000)
+# Attempts per request; the client backs off with jitter on 408/429/5xx
+GEMINI_RETRY_ATTEMPTS = 3
+# A Slack thread waits on each interactive analysis, so it runs on the priority
+# tier; "standard" or "flex" trade latency for cost
+GEMINI_SERVICE_TIER = os.getenv("GEMINI_SERVICE_TIER", "priority")
+
+# Worker pool for fanning out download + analysis of several images at once
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("IMAGE_ANALYSIS_WORKERS", "8")))
+# Separate pool for OCR strips so image pipelines never wait on their own pool
+_ocr_executor = ThreadPoolExecutor(max_workers=OCR_CPU_COUNT)
+
+
+def _get_gemini_client():
+    """Return the shared Gemini client, creating it on first use"""
+    global _GEMINI_CLIENT
+    if _GEMINI_CLIENT is None:
+        with _gemini_client_lock:
+            if _GEMINI_CLIENT is None:
+                from google import genai
+                from google.genai import types
+                _GEMINI_CLIENT = genai.Client(
+                    api_key=GEMINI_API_KEY,
+                    http_options=types.HttpOptions(
+                        retry_options=types.HttpRetryOptions(attempts=GEMINI_RETRY_ATTEMPTS)
+                    )
+                )
+    return _GEMINI_CLIENT
+
+
+def _preprocess_for_ocr(image_data: bytes) -> np.ndarray:
+    """Decode to grayscale, binarize and deskew an image ahead of Tesseract"""
+    import cv2
+
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Could not decode image data")
+
+    if image.shape[1] < OCR_MIN_WIDTH:
+        image = cv2.resize(image, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+
+    binary = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+    # Estimate skew from the bounding box of the dark (text/line) pixels
+    ink = cv2.findNonZero(cv2.bitwise_not(binary))
+    if ink is None:
+        return binary
+    # OpenCV 4.5+ reports angles in (0, 90] and 5.x in [-90, 0); a box is the same
+    # every 90 degrees, so fold either convention into [-45, 45)
+    angle = (cv2.minAreaRect(ink)[-1] + 45) % 90 - 45
+    if 0 < abs(angle) <= OCR_MAX_DESKEW_DEGREES:
+        height, width = binary.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        binary = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_CUBIC,
+                                borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+    return binary
+
+
+def _split_into_strips(binary: np.ndarray, count: int) -> list:
+    """Split a binarized image into horizontal strips, cutting on blank rows where possible"""
+    height = binary.shape[0]
+    strip_height = height // count
+    blank_rows = np.flatnonzero(binary.min(axis=1) == 255)
+
+    cuts = [0]
+    for i in range(1, count):
+        cut = i * strip_height
+        if blank_rows.size:
+            nearest = int(blank_rows[np.abs(blank_rows - cut).argmin()])
+            # Avoid slicing through a line of text unless no gap is close by
+            if abs(nearest - cut) <= strip_height // 4:
+                cut = nearest
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(height)
+
+    return [binary[top:bottom] for top, bottom in zip(cuts, cuts[1:]) if bottom > top]
+
+
+def _ocr(binary: np.ndarray) -> str:
+    """Run Tesseract on a binarized image, in parallel strips when it is large"""
+    import pytesseract
+
+    strip_count = min(OCR_CPU_COUNT, binary.shape[0] // OCR_MIN_STRIP_HEIGHT)
+    if binary.size <= OCR_TILE_MIN_PIXELS or strip_count < 2:
+        return pytesseract.image_to_string(binary, config=TESSERACT_CONFIG)
+
+    strips = _split_into_strips(binary, strip_count)
+    logger.debug(f"Running OCR on {len(strips)} strips in parallel")
+    # pytesseract shells out to the tesseract binary, so threads run the strips concurrently
+    return "\n".join(_ocr_executor.map(
+        lambda strip: pytesseract.image_to_string(strip, config=TESSERACT_CONFIG),
+        strips
+    ))
+
+
+def _sniff_mime_type(image_data: bytes):
+    """Return the MIME type for PNG/JPEG data from its magic number, or None"""
+    if image_data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if image_data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    return None
+
+
+def _gemini_cache_key(image_data: bytes) -> str:
+    """Build the cache key for a Gemini analysis of the given image"""
+    return f"{CACHE_VERSION}:{GEMINI_MODEL}:{hashlib.sha256(image_data).hexdigest()}:{PROMPT_HASH}"
+
+
+def _format_gemini_analysis(gemini_analysis: str) -> str:
+    """Wrap Gemini's raw analysis with context for the downstream prompt"""
+    return f"""Architecture Diagram Analysis (Gemini):
+
+    {gemini_analysis}
+    Note: This text was extracted from an architecture diagram using OCR. The structure and layout of components may provide additional context beyond the extracted text.
+    """
+
 
 class ImageAnalyzer:
+    # "gemini" (with Tesseract fallback) or "tesseract"
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "gemini")
+
+    @staticmethod
+    def analyze(image_data: bytes) -> str:
+        """
+        Analyze an image with the configured backend
+
+        Only one backend runs per image. With the Gemini backend, Tesseract is
+        used only if the Gemini call fails.
+
+        Args:
+            image_data (bytes): Raw image data
+
+        Returns:
+            str: Analysis text for the image
+        """
+        if ImageAnalyzer.OCR_BACKEND == "tesseract":
+            return ImageAnalyzer.extract_text_from_image(image_data)
+
+        try:
+            return ImageAnalyzer.extract_text_from_image_gemini(image_data)
+        except ValueError as gemini_error:
+            logger.warning(f"Gemini OCR failed: {gemini_error}. Attempting fallback with Tesseract...")
+            try:
+                return ImageAnalyzer.extract_text_from_image(image_data)
+            except ValueError as tesseract_error:
+                logger.error(f"Tesseract OCR fallback also failed: {tesseract_error}")
+                raise ValueError(f"Image analysis failed with both Gemini and Tesseract. Gemini error: {gemini_error}, Tesseract error: {tesseract_error}") from tesseract_error
+
     @staticmethod
     def extract_text_from_image(image_data: bytes) -> str:
         """
@@ -26,12 +247,18 @@ class ImageAnalyzer:
         """
         try:
             logger.info("Starting OCR text extraction")
+
+            cache_key = f"{CACHE_VERSION}:tesseract:{hashlib.sha256(image_data).hexdigest()}"
+            cached_text = _analysis_cache.get(cache_key)
+            if cached_text is not None:
+                logger.info("Returning cached OCR result")
+                return cached_text
             
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
+            # Grayscale, threshold and deskew before OCR
+            binary = _preprocess_for_ocr(image_data)
             
             # Extract text using pytesseract
-            text = pytesseract.image_to_string(image)
+            text = _ocr(binary)
             
             logger.info(f"Successfully extracted {len(text)} characters from image")
             
@@ -45,7 +272,8 @@ Components and Connections Identified:
 {cleaned_text}
 
 Note: This text was extracted from an architecture diagram using OCR. The structure and layout of components may provide additional context beyond the extracted text."""
-            
+
+            _analysis_cache.set(cache_key, formatted_text, expire=CACHE_EXPIRE_SECONDS)
             return formatted_text
             
         except Exception as e:
@@ -66,48 +294,42 @@ Note: This text was extracted from an architecture diagram using OCR. The struct
         try:
             logger.info("Starting Gemini image analysis")
 
-            # Detect image format using PIL
-            try:
-                image = Image.open(io.BytesIO(image_data))
-                # mime_type = Image.MIME[image.format] # Unused variable removed
-            except Exception as e:  # Handle invalid image data
-                logger.error(f"Invalid image data: {e}")
-                raise ValueError("Could not determine image format. Please provide a valid image.")
-
-
-            client = genai.Client(api_key=GEMINI_API_KEY) # replace w/ your API key
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",  # Or -exp if necessary
-                contents=[
-                    '''
-                        "Act as a Security Analyst specializing in Zero Trust Architecture. Your first task is to meticulously analyze the provided architecture diagram. Provide an **extremely detailed description and inventory** of all components, connections, and zones. As you describe each element, **immediately identify and note any aspects that appear potentially problematic or misaligned with core Zero Trust principles** ('never trust, always verify', least privilege, assume breach, micro-segmentation, explicit verification).
-
-                        **Do not provide comprehensive solutions or recommendations yet.** Focus on description combined with flagging initial Zero Trust concerns based *only* on the visual evidence. Structure your analysis like this:
-
-                        1.  **Overall System Context:** Briefly describe the likely purpose/type of system shown.
-                        2.  **Component Inventory & Initial ZT Notes:** List *every* identifiable component (servers, databases, firewalls, load balancers, user endpoints, cloud services, APIs, etc.). For each:
-                            * Identify its type and likely function.
-                            * Describe its *implied security role or context*.
-                            * **Initial ZT Observation:** Note if its placement, connections, or nature raises potential Zero Trust concerns (e.g., 'Database: Located in a broad 'internal' zone, potentially accessible by multiple services without apparent granular controls, raising concerns about least privilege.', 'Web Server: Public-facing, standard component. Note if connections bypass expected security controls like a WAF if one isn't shown.').
-                        3.  **Connections, Flows, & Initial ZT Notes:** Describe all visible connections and data flow paths (mention direction if possible).
-                            * **Initial ZT Observation:** Note if flows imply excessive trust, lack obvious verification points, or cross boundaries without clear mediation (e.g., 'Flow - App Server to Database: Direct connection within the same zone shown. This might represent implicit trust; verification mechanism unclear from diagram.', 'Flow - User to Web Server: Appears to go through perimeter firewall only. Need to later verify if additional layers like WAF, authentication exist.').
-                        4.  **Boundaries, Zones, & Initial ZT Notes:** Identify visual or implied zones (DMZ, Internal, Trusted, Untrusted, VPCs, Subnets). Describe their apparent purpose.
-                            * **Initial ZT Observation:** Note if zones seem overly large ('flat network'), suggesting significant implicit trust and potential for lateral movement, contrary to micro-segmentation goals. Note lack of internal segmentation if apparent (e.g., 'Internal Zone: Appears monolithic, containing diverse services. Lack of internal segmentation could be a key Zero Trust gap.').
-                        5.  **Summary of Potential ZT Gaps:** Briefly list the 2-4 most prominent potential Zero Trust issues flagged during the description (e.g., 'Apparent large implicit trust zones', 'Lack of visible internal segmentation', 'Unclear verification points for internal service communication')."
-                    ''',  # Your prompt
-                    image
-                ])
-
-            gemini_analysis = response.text
-
-            # Optional: Add context or reformatting if desired.  Example:
-            formatted_text = f"""Architecture Diagram Analysis (Gemini):
+            cache_key = _gemini_cache_key(image_data)
+            cached_text = _analysis_cache.get(cache_key)
+            if cached_text is not None:
+                logger.info("Returning cached Gemini analysis")
+                return cached_text
 
-    {gemini_analysis}
-    Note: This text was extracted from an architecture diagram using OCR. The structure and layout of components may provide additional context beyond the extracted text.
-    """
+            from google.genai import types
+
+            # PNG/JPEG bytes go to Gemini as-is, skipping a PIL decode and SDK re-encode
+            mime_type = _sniff_mime_type(image_data)
+            if mime_type:
+                image = types.Part.from_bytes(data=image_data, mime_type=mime_type)
+            else:
+                from PIL import Image
+
+                # Detect image format using PIL
+                try:
+                    image = Image.open(io.BytesIO(image_data))
+                except Exception as e:  # Handle invalid image data
+                    logger.error(f"Invalid image data: {e}")
+                    raise ValueError("Could not determine image format. Please provide a valid image.")
+
+            client = _get_gemini_client()
+            with _gemini_rate_limiter:
+                response = client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=[
+                        _GEMINI_ANALYSIS_PROMPT,
+                        image
+                    ],
+                    config=types.GenerateContentConfig(service_tier=GEMINI_SERVICE_TIER))
+
+            formatted_text = _format_gemini_analysis(response.text)
 
             logger.info(f"Gemini analysis complete, formatted text {formatted_text}")
+            _analysis_cache.set(cache_key, formatted_text, expire=CACHE_EXPIRE_SECONDS)
             return formatted_text
 
 
@@ -115,6 +337,94 @@ Note: This text was extracted from an architecture diagram using OCR. The struct
             logger.error(f"Error analyzing image with Gemini: {str(e)}")
             raise ValueError(f"Failed to analyze image: {str(e)}")
 
+    @staticmethod
+    def analyze_images_batch(images: list) -> list:
+        """
+        Analyze many images through the Gemini Batch API.
+
+        Batch jobs are billed at a discount but complete asynchronously (up to
+        24h), so this is meant for offline bulk runs rather than Slack events.
+
+        Args:
+            images (list): Raw image data for each image
+
+        Returns:
+            list: Gemini's analysis of each image, in the same order as images
+        """
+        try:
+            results = [_analysis_cache.get(_gemini_cache_key(image_data)) for image_data in images]
+            pending = [idx for idx, result in enumerate(results) if result is None]
+            if not pending:
+                logger.info("All batch images found in cache")
+                return results
+
+            from google.genai import types
+
+            inline_requests = []
+            for idx in pending:
+                mime_type = _sniff_mime_type(images[idx])
+                if not mime_type:
+                    from PIL import Image
+
+                    try:
+                        mime_type = Image.MIME[Image.open(io.BytesIO(images[idx])).format]
+                    except Exception as e:  # Handle invalid image data
+                        logger.error(f"Invalid image data at index {idx}: {e}")
+                        raise ValueError(f"Could not determine format of image {idx}. Please provide valid images.")
+
+                inline_requests.append(types.InlinedRequest(contents=[
+                    types.Content(role="user", parts=[
+                        types.Part.from_text(text=_GEMINI_ANALYSIS_PROMPT),
+                        types.Part.from_bytes(data=images[idx], mime_type=mime_type)
+                    ])
+                ]))
+
+            logger.info(f"Submitting Gemini batch job for {len(inline_requests)} images")
+            client = _get_gemini_client()
+            batch_job = client.batches.create(
+                model=GEMINI_MODEL,
+                src=inline_requests,
+                config={"display_name": f"secarchbot-{int(time.time())}"}
+            )
+
+            deadline = time.monotonic() + BATCH_MAX_WAIT_SECONDS
+            while batch_job.state.name not in BATCH_DONE_STATES:
+                if time.monotonic() > deadline:
+                    client.batches.cancel(name=batch_job.name)
+                    raise ValueError(f"Batch job {batch_job.name} still {batch_job.state.name} after {BATCH_MAX_WAIT_SECONDS}s")
+                logger.debug(f"Gemini batch job {batch_job.name} state: {batch_job.state.name}")
+                time.sleep(BATCH_POLL_INTERVAL_SECONDS)
+                batch_job = client.batches.get(name=batch_job.name)
+
+            if batch_job.state.name not in BATCH_SUCCESS_STATES:
+                raise ValueError(f"Batch job {batch_job.name} ended in state {batch_job.state.name}")
+
+            inline_responses = (batch_job.dest and batch_job.dest.inlined_responses) or []
+            if len(inline_responses) != len(pending):
+                raise ValueError(f"Batch job {batch_job.name} returned {len(inline_responses)} responses for {len(pending)} images")
+
+            # Cache every successful response before reporting failures, so a retry
+            # only resubmits the images that failed
+            failed = []
+            for idx, inline_response in zip(pending, inline_responses):
+                if inline_response.error:
+                    logger.error(f"Batch request for image {idx} failed: {inline_response.error}")
+                    failed.append(idx)
+                    continue
+                formatted_text = _format_gemini_analysis(inline_response.response.text)
+                _analysis_cache.set(_gemini_cache_key(images[idx]), formatted_text, expire=CACHE_EXPIRE_SECONDS)
+                results[idx] = formatted_text
+
+            if failed:
+                raise ValueError(f"Batch requests failed for images {failed}")
+
+            logger.info(f"Gemini batch job {batch_job.name} complete")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error analyzing images with Gemini batch: {str(e)}")
+            raise ValueError(f"Failed to analyze images in batch: {str(e)}")
+
     @staticmethod
     def download_image(url: str, headers: dict = None) -> bytes:
         """
@@ -130,12 +440,75 @@ Note: This text was extracted from an architecture diagram using OCR. The struct
         try:
             logger.info(f"Downloading image from URL: {url}")
             
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            logger.info(f"Successfully downloaded {len(response.content)} bytes")
-            return response.content
+            # Revalidate a previously downloaded copy instead of fetching it again
+            request_headers = dict(headers or {})
+            cached = _download_cache.get(url)
+            if cached:
+                etag, last_modified, _ = cached
+                if etag:
+                    request_headers["If-None-Match"] = etag
+                if last_modified:
+                    request_headers["If-Modified-Since"] = last_modified
+
+            with _session.get(url, headers=request_headers, stream=True, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+                if cached and response.status_code == 304:
+                    logger.info(f"Image not modified, using cached copy ({len(cached[2])} bytes)")
+                    return cached[2]
+                response.raise_for_status()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+                # Content-Length is the encoded size, so only presize unencoded bodies
+                length = 0 if response.headers.get("Content-Encoding") else int(response.headers.get("Content-Length", 0))
+                if length:
+                    buffer = bytearray(length)
+                    offset = 0
+                    with memoryview(buffer) as view:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            end = offset + len(chunk)
+                            if end > length:
+                                raise ValueError(f"Received more than the advertised {length} bytes")
+                            view[offset:end] = chunk
+                            offset = end
+                    if offset != length:
+                        raise ValueError(f"Received {offset} of {length} bytes")
+                else:
+                    buffer = bytearray()
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        buffer.extend(chunk)
+                    offset = len(buffer)
+
+            logger.info(f"Successfully downloaded {offset} bytes")
+            image_data = bytes(buffer)
+            if etag or last_modified:
+                _download_cache.set(url, (etag, last_modified, image_data), expire=CACHE_EXPIRE_SECONDS)
+            return image_data
             
         except Exception as e:
             logger.error(f"Error downloading image: {str(e)}")
             raise ValueError(f"Failed to download image: {str(e)}")
+
+    @staticmethod
+    def analyze_images(image_urls: list, headers: dict = None) -> list:
+        """
+        Download and analyze several images concurrently
+
+        Each image is downloaded and analyzed on a worker thread, so the
+        network round trips for different images overlap instead of running
+        one after another.
+
+        Args:
+            image_urls (list): Image URLs
+            headers (dict): Optional headers for the download requests
+
+        Returns:
+            list: Analysis text for each image, in the same order as image_urls
+        """
+        def pipeline(url):
+            image_data = ImageAnalyzer.download_image(url, headers=headers)
+            extracted_text = ImageAnalyzer.analyze(image_data)
+            logger.info(f"Successfully extracted text from image ({len(extracted_text)} chars)")
+            return extracted_text
+
+        logger.info(f"Analyzing {len(image_urls)} images concurrently")
+        return list(_executor.map(pipeline, image_urls))
@@ -1,19 +1,39 @@
-import json
+import orjson
+import atexit
+import copy
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-import datetime
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# LogRecord attributes that are already covered by the standard fields
+_SKIP_KEYS = frozenset({
+    "args", "exc_info", "exc_text", "msg", "message",
+    "levelname", "levelno", "pathname", "filename",
+    "module", "lineno", "funcName", "created",
+    "msecs", "relativeCreated", "thread", "threadName",
+    "processName", "process", "name", "stack_info", "taskName"
+})
+
+
+def _format_timestamp(created):
+    """Format a LogRecord creation time as an ISO 8601 UTC string"""
+    seconds = int(created)
+    microseconds = int((created - seconds) * 1_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{microseconds:06d}Z"
+
 
 class JsonFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging"""
     def format(self, record):
         # Standard fields
         log_record = {
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "timestamp": _format_timestamp(record.created),
             "level": record.levelname,
             # "service": BOT_NAME, # Removed
             "logger_name": record.name,
@@ -24,13 +44,10 @@ class JsonFormatter(logging.Formatter):
         }
         
         # Add all extra fields from record
-        for key, value in record.__dict__.items():
-            if key not in ["args", "exc_info", "exc_text", "msg", "message", 
-                          "levelname", "levelno", "pathname", "filename", 
-                          "module", "lineno", "funcName", "created", 
-                          "msecs", "relativeCreated", "thread", "threadName", 
-                          "processName", "process", "name"]:
-                log_record[key] = value
+        log_record.update({key: value for key, value in record.__dict__.items() if key not in _SKIP_KEYS})
+
+        if record.stack_info:
+            log_record["stack_info"] = self.formatStack(record.stack_info).split('\n')
                     
         # Handle exceptions
         if record.exc_info:
@@ -38,11 +55,29 @@ class JsonFormatter(logging.Formatter):
             log_record["error_message"] = str(record.exc_info[1])
             log_record["traceback"] = self.formatException(record.exc_info).split('\n')
 
-        return json.dumps(log_record)
+        return orjson.dumps(log_record, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that keeps exception info for the JSON formatter"""
+    def prepare(self, record):
+        # The stock prepare() formats the record and drops exc_info, which would
+        # lose the structured error fields. Only resolve the message args here.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_LOGGER = None
 
 
 def get_logger():
     """Set up and configure the centralized logger"""
+    global _LOGGER
+    if _LOGGER is not None:
+        return _LOGGER
+
     # Create logs directory if it doesn't exist
     log_file = os.environ.get("LOG_FILE", "logs/secarchbot.log")
     if log_file:
@@ -54,7 +89,13 @@ def get_logger():
     logger.setLevel(getattr(logging, log_level))
     logger.propagate = False
     
-    # Clear existing handlers
+    # Clear existing handlers, stopping the listener left by a previous module load
+    previous_listener = getattr(logger, "queue_listener", None)
+    if previous_listener:
+        atexit.unregister(previous_listener.stop)
+        previous_listener.stop()
+        for handler in previous_listener.handlers:
+            handler.close()
     if logger.handlers:
         logger.handlers.clear()
     
@@ -64,15 +105,24 @@ def get_logger():
     # Add console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
-    # Add file handler if log file is specified
+    # Add file handler if log file is specified. WatchedFileHandler reopens the
+    # file after log rotation; delay defers creating it until the first write.
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.handlers.WatchedFileHandler(log_file, delay=True)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
+    # Format and write on a background thread so logging never blocks callers
+    log_queue = queue.Queue(-1)
+    logger.addHandler(RecordQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.queue_listener = listener
 
-    return logger
+    _LOGGER = logger
+    return _LOGGER
 
 logger = get_logger()
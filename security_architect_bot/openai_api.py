@@ -1,10 +1,18 @@
+import os
 from openai import OpenAI
 from logger import logger # Import the centralized logger
+from rate_limiter import RateLimiter
+
+MODEL = "gpt-4"
+# The client retries 429/5xx responses with jittered exponential backoff
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+_rate_limiter = RateLimiter.from_env("openai", 8, 500)
 
 class OpenAIAPI:
     def __init__(self, api_key):
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, max_retries=MAX_RETRIES)
         
     def chat_completion(self, prompt, prompt_sys=None, temperature=0.7, max_tokens=4000):
         """
@@ -17,12 +25,13 @@ class OpenAIAPI:
         
         try:
             logger.info("Sending chat completion request to OpenAI API")
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with _rate_limiter:
+                response = self.client.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
             logger.info("Successfully received response from OpenAI API")
             
             if response.choices and response.choices[0].message.content:
@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+from logger import logger # Import the centralized logger
+
+
+class RateLimiter:
+    """Client-side limit on concurrent calls and requests per minute to an API"""
+    def __init__(self, name, max_concurrency, requests_per_minute):
+        self.name = name
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.capacity = float(requests_per_minute)
+        self.tokens = self.capacity
+        self.refill_rate = requests_per_minute / 60.0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, default_concurrency, default_requests_per_minute):
+        """
+        Build a limiter configured from <NAME>_MAX_CONCURRENCY and
+        <NAME>_REQUESTS_PER_MINUTE, falling back to the given defaults
+        """
+        prefix = name.upper()
+        return cls(
+            name,
+            int(os.getenv(f"{prefix}_MAX_CONCURRENCY", default_concurrency)),
+            int(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", default_requests_per_minute))
+        )
+
+    def _take_token(self):
+        """Block until the token bucket allows another request"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.refill_rate
+            logger.debug(f"{self.name} rate limit reached, waiting {delay:.2f}s")
+            time.sleep(delay)
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        try:
+            self._take_token()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.semaphore.release()
+        return False
@@ -1,18 +1,41 @@
+import io
 import os
 import sys
 import re
 import signal
 import atexit
+import fcntl
+import threading
 import traceback
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from PIL import Image
 from eraser_api import EraserAPI
-from openai_api import OpenAIAPI
+from openai_api import OpenAIAPI, MODEL as OPENAI_MODEL
 from image_analyzer import ImageAnalyzer
+from cache import open_cache
 from logger import logger
 
+# Shared session for direct Slack API calls, with keep-alive and retries on 429/5xx
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False
+    )
+))
+
 def test_slack_connection(token):
     """Test connection to Slack API"""
     headers = {
@@ -21,7 +44,7 @@ def test_slack_connection(token):
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             "https://slack.com/api/auth.test",
             headers=headers,
             verify=True
@@ -40,16 +63,46 @@ from threat_analyzer import create_analysis_prompt
 # Global variables for connection management
 active_handler = None
 should_exit = False
+# Held for the process lifetime; the kernel releases the lock on exit or crash
+lock_fd = None
+# Created once the Slack app is set up; see EventCoalescer
+event_coalescer = None
+
+# Background workers for diagram generation, overlapped with posting the analysis
+diagram_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("DIAGRAM_WORKERS", "4")))
+
+# Parsed analyses keyed by prompt hash, so resubmitted architectures skip OpenAI
+analysis_cache = open_cache("ANALYSIS_CACHE_DIR", "analysis")
+ANALYSIS_CACHE_EXPIRE_SECONDS = 30 * 86400
+# Bump to invalidate cached analyses when their format or parsing changes
+ANALYSIS_CACHE_VERSION = "v1"
+
+ANALYSIS_SYSTEM_PROMPT = "You are a zero trust security architect. Always respond with syntactically valid JSON, including all necessary commas between properties and array items."
+ANALYSIS_TEMPERATURE = 0.7
+
+def analysis_cache_key(prompt):
+    """Cache key for the analysis of a prompt, covering every input to the OpenAI request"""
+    request_hash = hashlib.sha256(f"{ANALYSIS_SYSTEM_PROMPT}\n\n{prompt}".encode()).hexdigest()
+    return f"{ANALYSIS_CACHE_VERSION}:{OPENAI_MODEL}:{ANALYSIS_TEMPERATURE}:{request_hash}"
+
+# Body of a ```json (or bare ```) fence in an LLM response
+JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+# Lenient fallback parser: accepts raw newlines in strings and ignores trailing text
+JSON_DECODER = json.JSONDecoder(strict=False)
+# Bot/user mentions such as <@U012AB3CD>; Slack IDs are ASCII-only
+MENTION_RE = re.compile(r'<@[A-Z0-9]+>', re.ASCII)
+
+# Formats one mrkdwn bullet line
+format_bullet = "• {}".format
 
 def cleanup():
     """Cleanup function to be called on exit"""
     global active_handler
+    if event_coalescer:
+        event_coalescer.discard_pending()
     if active_handler:
         try:
             active_handler.close()
-            # Remove PID file
-            if os.path.exists("/tmp/slack_analyzer.pid"):
-                os.remove("/tmp/slack_analyzer.pid")
         except:
             pass
 
@@ -72,17 +125,32 @@ load_dotenv()
 required_vars = ["SLACK_BOT_TOKEN", "SLACK_APP_TOKEN", "SLACK_SIGNING_SECRET", "OPENAI_API_KEY", "ERASER_API_TOKEN", "GEMINI_API_KEY"]
 missing_vars = [var for var in required_vars if not os.environ.get(var)]
 if missing_vars:
-    logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
+    logger.error("Missing required environment variables: %s", ', '.join(missing_vars))
     sys.exit(1)
 
+# Read credentials once; handlers use these instead of looking them up per event
+SLACK_BOT_TOKEN = os.environ["SLACK_BOT_TOKEN"]
+SLACK_APP_TOKEN = os.environ["SLACK_APP_TOKEN"]
+SLACK_SIGNING_SECRET = os.environ["SLACK_SIGNING_SECRET"]
+OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
+ERASER_API_TOKEN = os.environ["ERASER_API_TOKEN"]
+
+# Headers for downloading files shared in Slack
+SLACK_DOWNLOAD_HEADERS = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
+
+# Number of Slack events handled at once. Each event spends most of its time
+# waiting on OpenAI/Gemini/Eraser, so a thread per in-flight event is cheap.
+MAX_CONCURRENT_EVENTS = int(os.environ.get("SLACK_MAX_CONCURRENT_EVENTS", "20"))
+
 sys.stdout.write("\n=== Starting SecArchBot ===\n")
 sys.stdout.write("Initializing Slack app...\n")
 sys.stdout.flush()
 try:
     # Initialize the Slack app
     app = App(
-        token=os.environ.get("SLACK_BOT_TOKEN"),
-        signing_secret=os.environ.get("SLACK_SIGNING_SECRET")
+        token=SLACK_BOT_TOKEN,
+        signing_secret=SLACK_SIGNING_SECRET,
+        listener_executor=ThreadPoolExecutor(max_workers=MAX_CONCURRENT_EVENTS)
     )
     sys.stdout.write("✓ Slack app initialized successfully\n")
     sys.stdout.flush()
@@ -93,44 +161,9 @@ except Exception as e:
     logger.error(error_msg)
     raise
 
-def extract_image_text(image_url):
-    """Extract text from image using OCR"""
-    try:
-        logger.info(f"Starting image analysis for URL: {image_url}")
-        
-        # Get headers for Slack API request
-        headers = {
-            "Authorization": f"Bearer {os.environ.get('SLACK_BOT_TOKEN')}",
-        }
-        
-        # Download image from Slack
-        logger.info("Downloading image from Slack...")
-        image_data = ImageAnalyzer.download_image(image_url, headers=headers)
-        logger.info(f"Successfully downloaded image ({len(image_data)} bytes)")
-        
-        # Attempt text extraction using Gemini first
-        extracted_text = ""
-        try:
-            logger.info("Attempting text extraction using Gemini...")
-            extracted_text = ImageAnalyzer.extract_text_from_image_gemini(image_data)
-            logger.info(f"Successfully extracted text using Gemini ({len(extracted_text)} chars)")
-        except Exception as gemini_error:
-            logger.warning(f"Gemini OCR failed: {gemini_error}. Attempting fallback with Tesseract...")
-            # Fallback to Tesseract OCR
-            try:
-                extracted_text = ImageAnalyzer.extract_text_from_image(image_data)
-                logger.info(f"Successfully extracted text using Tesseract fallback ({len(extracted_text)} chars)")
-            except Exception as tesseract_error:
-                logger.error(f"Tesseract OCR fallback also failed: {tesseract_error}")
-                # Re-raise the original Gemini error or a combined error if preferred
-                raise ValueError(f"Image analysis failed with both Gemini and Tesseract. Gemini error: {gemini_error}, Tesseract error: {tesseract_error}") from tesseract_error
-
-        return extracted_text
-                
-    except Exception as e:
-        logger.error(f"Error in image analysis: {str(e)}")
-        logger.error(traceback.format_exc())
-        raise ValueError(f"Image analysis failed: {str(e)}")
+# API clients are shared across events so their pooled connections stay warm
+OPENAI_CLIENT = OpenAIAPI(api_key=OPENAI_API_KEY)
+ERASER_CLIENT = EraserAPI(ERASER_API_TOKEN)
 
 def analyze_architecture(text, image_text=""):
     """Process the text and generate zero trust security analysis"""
@@ -149,31 +182,98 @@ def analyze_architecture(text, image_text=""):
             app_input=combined_input
         )
 
+        cached_result = analysis_cache.get(analysis_cache_key(prompt))
+        if cached_result is not None:
+            logger.info("Returning cached architecture analysis")
+            return cached_result, prompt
+
         # Get the analysis using OpenAI
         logger.info("Getting analysis from OpenAI")
-        client = OpenAIAPI(api_key=os.environ.get("OPENAI_API_KEY"))
-        response = client.chat_completion(
+        response = OPENAI_CLIENT.chat_completion(
             prompt=prompt,
-            prompt_sys="You are a zero trust security architect. Always respond with syntactically valid JSON, including all necessary commas between properties and array items."
+            prompt_sys=ANALYSIS_SYSTEM_PROMPT,
+            temperature=ANALYSIS_TEMPERATURE
         )
         
-        # Clean up response and parse JSON
-        if "```json" in response:
-            content = response.split("```json")[1].split("```")[0]
-        elif "```" in response:
-            content = response.split("```")[1].split("```")[0]
-        else:
-            content = response
-            
-        content = content.replace('\n', '').replace('  ', ' ').strip()
+        # Take the fenced body if there is one, then start at its first brace
+        match = JSON_FENCE_RE.search(response)
+        content = match.group(1) if match else response
+        start = content.find('{')
+        if start > 0:
+            content = content[start:]
+        try:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson rejects raw newlines inside strings and trailing prose; raw_decode tolerates both
+            result, _ = JSON_DECODER.raw_decode(content)
+        # Cached by process_message once the result is known to render
         # Return both the parsed JSON content and the prompt used
-        return json.loads(content), prompt
+        return result, prompt
         
     except Exception as e:
-        logger.error(f"Error analyzing architecture: {str(e)}")
+        logger.error("Error analyzing architecture: %s", e)
         logger.error(traceback.format_exc())
         return None
 
+def generate_diagram(analysis_result, combined_text):
+    """Generate the diagram for the recommended solution and return the PNG bytes"""
+    logger.info("Generating architecture diagram using Eraser.io")
+
+    # Create the diagram prompt based on selected solution
+    selected_solution = analysis_result["recommendation"]["selected_solution"]
+    solution_details = next(
+        (s for s in analysis_result["solutions"] if s["name"] == selected_solution),
+        None
+    )
+    
+    if not solution_details:
+        raise Exception("Selected solution details not found")
+    
+    # Create a focused diagram prompt for the selected solution
+    diagram_prompt = f"""
+Generate a detailed zero trust architecture diagram for the recommended solution:
+
+System: {combined_text}
+
+Approach: {solution_details['approach']}
+
+Key Components to Visualize:
+
+1. Identity & Authentication:
+{chr(10).join(f'- {item}' for item in solution_details['technical_components']['identity_provider'])}
+
+2. Network Security:
+{chr(10).join(f'- {item}' for item in solution_details['technical_components']['network_architecture'])}
+
+3. Security Rationale:
+{solution_details['technical_components']['security_rationale']}
+
+Required Elements:
+1. Authentication & Authorization Flow
+2. Network Segmentation Boundaries
+3. Data Encryption Points
+4. Security Control Checkpoints
+5. Trust Boundaries
+
+Style Guidelines:
+- Use clear visual separation between security zones
+- Highlight authentication/authorization checkpoints
+- Show data flow with encryption indicators
+- Include security control labels
+- Use a color scheme that emphasizes security boundaries
+"""
+    
+    # Generate the diagram
+    diagram_response = ERASER_CLIENT.generate_diagram_from_prompt(diagram_prompt)
+    
+    if 'bytes' in diagram_response:
+        return diagram_response['bytes']
+    if 'url' in diagram_response:
+        # Download the image from URL
+        logger.debug("Downloading diagram from URL...")
+        return ImageAnalyzer.download_image(diagram_response['url'])
+    raise Exception("No diagram image or URL in Eraser.io response")
+
 def process_message(event, say, client, thread_ts=None):
     """Common message processing logic"""
     request_time = datetime.now(timezone.utc) # Capture request time
@@ -183,36 +283,29 @@ def process_message(event, say, client, thread_ts=None):
     try:
         # --- Extract Event Details ---
         # Handle different event structures (direct message vs mention vs payload)
-        if isinstance(event, dict) and 'payload' in event and 'event' in event['payload']:
-            event_data = event['payload']['event']
-        elif isinstance(event, dict) and 'type' in event: # Standard event structure
-             event_data = event
-        else:
-             logger.warning(f"Unexpected event structure: {event}")
-             event_data = {} # Fallback to empty dict
+        event_data = event.get('payload', {}).get('event') or event
+        if 'type' not in event_data:
+            logger.warning("Unexpected event structure: %s", event)
 
         user_id = event_data.get('user')
         channel_id = event_data.get('channel')
         thread_ts = event_data.get('thread_ts', thread_ts or event_data.get('ts')) # Ensure thread_ts is captured
 
-        logger.info(f"Processing message event for user {user_id} in channel {channel_id}, thread {thread_ts}")
-        logger.debug(f"Full event data: {event_data}")
+        logger.info("Processing message event for user %s in channel %s, thread %s", user_id, channel_id, thread_ts)
+        logger.debug("Full event data: %s", event_data)
 
         # Extract text from the message
         text = ''
-        if event.get('text'):
+        if event_data.get('text'):
             # Remove bot mention if present
-            text = re.sub(r'<@[A-Z0-9]+>', '', event['text']).strip()
-            logger.info(f"Extracted text: {text}")
+            text = MENTION_RE.sub('', event_data['text']).strip()
+            logger.info("Extracted text: %s", text)
         
         # Check for files (images)
-        files = event.get('files', [])
-        if isinstance(event, dict) and 'payload' in event:
-            event_data = event['payload'].get('event', {})
-            files = event_data.get('files', []) # Use extracted event_data
-            logger.debug(f"Files found in event: {files}")
+        files = event_data.get('files', [])
+        logger.debug("Files found in event: %s", files)
         image_files = [f for f in files if f and f.get('mimetype', '').startswith('image/')] # Added check for f existence
-        logger.info(f"Found {len(image_files)} image files")
+        logger.info("Found %s image files", len(image_files))
 
         # input_attachments_log = [...] # Removed unused variable assignment
 
@@ -224,18 +317,17 @@ def process_message(event, say, client, thread_ts=None):
         # Extract text from image if available
         image_text = ""
         if image_files:
-            # Extract text from each image file
-            image_texts = []
-            for image_file in image_files:
-                image_url = image_file.get('url_private')
-                if image_url:
-                    # Get image text using OCR
-                    extracted_text = extract_image_text(image_url)
-                    if extracted_text:
-                        image_texts.append(extracted_text)
+            # Extract text from all image files in parallel, keeping message order
+            image_urls = [image_file.get('url_private') for image_file in image_files if image_file.get('url_private')]
+            try:
+                image_texts = [extracted_text for extracted_text in ImageAnalyzer.analyze_images(image_urls, headers=SLACK_DOWNLOAD_HEADERS) if extracted_text]
+            except Exception as e:
+                logger.error("Error in image analysis: %s", e)
+                logger.error(traceback.format_exc())
+                raise ValueError(f"Image analysis failed: {str(e)}")
             
             image_text = "\n".join(image_texts)
-            logger.info(f"Image detected: Architecture diagram analyzed")
+            logger.info("Image detected: Architecture diagram analyzed")
         
         # Combine text from message and image
         combined_text = f"{text}\n{image_text}".strip()
@@ -262,6 +354,8 @@ def process_message(event, say, client, thread_ts=None):
             logger.error("Analysis failed to produce results (analysis_result is None/empty)")
             say("Failed to analyze architecture. Please try again.", thread_ts=thread_ts)
             return
+
+        diagram_future = None
             
         try:
             logger.info("Processing analysis results")
@@ -280,6 +374,7 @@ def process_message(event, say, client, thread_ts=None):
 
             # Add solutions
             for idx, solution in enumerate(analysis_result["solutions"], 1):
+                components = solution['technical_components']
                 blocks.extend([
                     {
                         "type": "section",
@@ -293,11 +388,11 @@ def process_message(event, say, client, thread_ts=None):
                         "fields": [
                             {
                                 "type": "mrkdwn",
-                                "text": "*Key Components*\n• Identity: " + ", ".join(solution['technical_components']['identity_provider'][:2]) + "\n• Network: " + ", ".join(solution['technical_components']['network_architecture'][:2])
+                                "text": f"*Key Components*\n• Identity: {', '.join(components['identity_provider'][:2])}\n• Network: {', '.join(components['network_architecture'][:2])}"
                             },
                             {
                                 "type": "mrkdwn",
-                                "text": "*Security Rationale*\n" + solution['technical_components']['security_rationale']
+                                "text": f"*Security Rationale*\n{components['security_rationale']}"
                             }
                         ]
                     },
@@ -315,6 +410,7 @@ def process_message(event, say, client, thread_ts=None):
 
             # Add recommendation if available
             if "recommendation" in analysis_result:
+                recommendation = analysis_result["recommendation"]
                 blocks.extend([
                     {
                         "type": "header",
@@ -328,155 +424,164 @@ def process_message(event, say, client, thread_ts=None):
                         "type": "section",
                         "text": {
                             "type": "mrkdwn",
-                            "text": f"*{analysis_result['recommendation']['selected_solution']}*"
+                            "text": f"*{recommendation['selected_solution']}*"
                         }
                     },
                     {
                         "type": "section",
                         "text": {
                             "type": "mrkdwn",
-                            "text": "*Technical Rationale*\n" + "\n".join(f"• {reason}" for reason in analysis_result["recommendation"]["technical_reasons"][:3])
+                            "text": "*Technical Rationale*\n" + "\n".join(map(format_bullet, recommendation["technical_reasons"][:3]))
                         }
                     },
                     {
                         "type": "section",
                         "text": {
                             "type": "mrkdwn",
-                            "text": "*Implementation Steps*\n" + "\n".join(f"• {step}" for step in analysis_result["recommendation"]["implementation_steps"][:3])
+                            "text": "*Implementation Steps*\n" + "\n".join(map(format_bullet, recommendation["implementation_steps"][:3]))
                         }
                     }
                 ])
 
+            # The analysis rendered, so start the diagram; Eraser works while the blocks are posted
+            diagram_future = diagram_executor.submit(generate_diagram, analysis_result, combined_text)
+
             # Send the formatted message using blocks
             say(blocks=blocks, thread_ts=thread_ts)
 
+            # Only cache analyses that rendered; generate_diagram also needs the recommendation
+            if "recommendation" in analysis_result:
+                analysis_cache.set(analysis_cache_key(system_prompt), analysis_result, expire=ANALYSIS_CACHE_EXPIRE_SECONDS)
+
             # --- Generate and send diagram ---
             # output_attachments_log = None # Removed unused variable initialization
             diagram_upload_response = None # Initialize response variable
             try:
-                logger.info("Generating architecture diagram using Eraser.io")
-
-                # Initialize Eraser API client
-                eraser = EraserAPI(os.environ.get("ERASER_API_TOKEN"))
+                # Wait for the diagram generated in the background
+                image_bytes = diagram_future.result()
                 
-                # Create the diagram prompt based on selected solution
-                selected_solution = analysis_result["recommendation"]["selected_solution"]
-                solution_details = next(
-                    (s for s in analysis_result["solutions"] if s["name"] == selected_solution),
-                    None
-                )
-                
-                if not solution_details:
-                    raise Exception("Selected solution details not found")
-                
-                # Create a focused diagram prompt for the selected solution
-                diagram_prompt = f"""
-Generate a detailed zero trust architecture diagram for the recommended solution:
-
-System: {combined_text}
-
-Approach: {solution_details['approach']}
-
-Key Components to Visualize:
-
-1. Identity & Authentication:
-{chr(10).join(f'- {item}' for item in solution_details['technical_components']['identity_provider'])}
-
-2. Network Security:
-{chr(10).join(f'- {item}' for item in solution_details['technical_components']['network_architecture'])}
-
-3. Security Rationale:
-{solution_details['technical_components']['security_rationale']}
-
-Required Elements:
-1. Authentication & Authorization Flow
-2. Network Segmentation Boundaries
-3. Data Encryption Points
-4. Security Control Checkpoints
-5. Trust Boundaries
-
-Style Guidelines:
-- Use clear visual separation between security zones
-- Highlight authentication/authorization checkpoints
-- Show data flow with encryption indicators
-- Include security control labels
-- Use a color scheme that emphasizes security boundaries
-"""
-                
-                # Generate the diagram
-                diagram_response = eraser.generate_diagram_from_prompt(diagram_prompt)
-                
-                if 'url' in diagram_response:
-                    # Download the image from URL
-                    logger.debug("Downloading diagram from URL...")
-                    image_url = diagram_response['url']
-                    image_response = requests.get(image_url)
-                    image_response.raise_for_status()
-                    
-                    # Save image temporarily
-                    temp_image_path = "/tmp/architecture_diagram.png"
-                    with open(temp_image_path, "wb") as f:
-                        f.write(image_response.content)
-                    
-                    # Remove transparency
-                    img = Image.open(temp_image_path)
+                # Remove transparency. Image.open only parses the header, so opaque
+                # diagrams (the common case) are never decoded or re-encoded.
+                with Image.open(io.BytesIO(image_bytes)) as img:
                     if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                        # Create new image with white background
-                        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
-                        if img.mode == 'P':
+                        if img.mode != 'RGBA':
                             img = img.convert('RGBA')
-                        # Composite the image onto the background
-                        img = Image.alpha_composite(background, img)
-                        # Convert back to RGB (no alpha)
-                        img = img.convert('RGB')
-                        # Save the modified image
-                        img.save(temp_image_path, 'PNG')
-                    
-                    try:
-                        # Upload the local image file to Slack
-                        # Use channel_id extracted earlier
-                        diagram_upload_response = client.files_upload_v2(
-                            channel=channel_id,
-                            title="secure_architecture_diagram",
-                            file=temp_image_path,
-                            initial_comment="Proposed Secure Architecture Diagram",
-                            thread_ts=thread_ts
-                        )
-                        logger.info("Architecture diagram upload successful")
-                        # Removed block for formatting unused output_attachments_log
-
-                    finally:
-                        # Clean up temp file
-                        if os.path.exists(temp_image_path):
-                            os.remove(temp_image_path)
-                else:
-                    raise Exception("No diagram URL in Eraser.io response")
-                    
+                        # Paste onto a white RGB background using alpha as the mask,
+                        # which yields the RGB result without a separate convert pass
+                        background = Image.new('RGB', img.size, (255, 255, 255))
+                        background.paste(img, mask=img.getchannel('A'))
+                        # Save the modified image; fast zlib level since file size doesn't matter here
+                        output = io.BytesIO()
+                        background.save(output, 'PNG', optimize=False, compress_level=1)
+                        image_bytes = output.getvalue()
+
+                # Upload the image to Slack straight from memory
+                # Use channel_id extracted earlier
+                diagram_upload_response = client.files_upload_v2(
+                    channel=channel_id,
+                    title="secure_architecture_diagram",
+                    filename="secure_architecture_diagram.png",
+                    file=image_bytes,
+                    initial_comment="Proposed Secure Architecture Diagram",
+                    thread_ts=thread_ts
+                )
+                logger.info("Architecture diagram upload successful")
+                # Removed block for formatting unused output_attachments_log
+                
             except Exception as diagram_error:
-                logger.error(f"Error generating diagram with Eraser.io: {str(diagram_error)}")
+                logger.error("Error generating diagram with Eraser.io: %s", diagram_error)
                 say(f"Failed to generate architecture diagram: {str(diagram_error)}", thread_ts=thread_ts)
 
         except Exception as e:
-            logger.error(f"Error processing analysis results or logging: {str(e)}")
+            logger.error("Error processing analysis results or logging: %s", e)
             logger.error(traceback.format_exc())
+            # Don't let an orphaned diagram hold an Eraser slot
+            if diagram_future and not diagram_future.cancel():
+                logger.warning("Diagram generation already started; its result will be discarded")
             # Send error message with key details
             say("Failed to process security analysis. Please check the logs for details.", thread_ts=thread_ts)
         
     except Exception as e:
-        logger.error(f"Error processing message: {str(e)}")
+        logger.error("Error processing message: %s", e)
         logger.error(traceback.format_exc())
         say(f"Sorry, I encountered an error: {str(e)}", thread_ts=thread_ts)
 
+def merge_events(events):
+    """Combine several message events into one, joining their text and files"""
+    event_bodies = [event.get('payload', {}).get('event') or event for event in events]
+    merged = dict(event_bodies[-1])
+    merged['text'] = "\n".join(body['text'] for body in event_bodies if body.get('text'))
+    merged['files'] = [f for body in event_bodies for f in body.get('files', [])]
+    return merged
+
+class EventCoalescer:
+    """Collapses rapid-fire events from one user in one thread into a single analysis"""
+    def __init__(self, window_seconds, handler, executor):
+        self.window_seconds = window_seconds
+        self.handler = handler
+        # Flushed events run here; the timers only schedule them
+        self.executor = executor
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def submit(self, event, say, client, thread_ts):
+        """Queue an event, restarting the window for its (channel, thread, user)"""
+        if self.window_seconds <= 0:
+            self.handler(event, say, client, thread_ts=thread_ts)
+            return
+
+        body = event.get('payload', {}).get('event') or event
+        key = (body.get('channel'), thread_ts, body.get('user'))
+        with self.lock:
+            entry = self.pending.setdefault(key, {"events": []})
+            if "timer" in entry:
+                entry["timer"].cancel()
+            entry["events"].append(event)
+            entry.update(say=say, client=client, thread_ts=thread_ts)
+            entry["timer"] = threading.Timer(self.window_seconds, self._flush, args=(key,))
+            entry["timer"].daemon = True
+            entry["timer"].start()
+
+    def _flush(self, key):
+        with self.lock:
+            entry = self.pending.pop(key, None)
+        if entry:
+            self.executor.submit(self._dispatch, entry)
+
+    def _dispatch(self, entry):
+        events = entry["events"]
+        event = events[0]
+        if len(events) > 1:
+            logger.info("Coalesced %s events for thread %s", len(events), entry['thread_ts'])
+            event = merge_events(events)
+        self.handler(event, entry["say"], entry["client"], thread_ts=entry["thread_ts"])
+
+    def discard_pending(self):
+        """Cancel all open windows at shutdown, logging the events that are dropped"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for (channel, thread_ts, user), entry in pending.items():
+            entry["timer"].cancel()
+            logger.warning("Dropping %s pending event(s) for thread %s in %s from %s at shutdown",
+                           len(entry["events"]), thread_ts, channel, user)
+
+# Events in the same thread arriving within this window are analyzed together
+event_coalescer = EventCoalescer(
+    float(os.environ.get("EVENT_COALESCE_SECONDS", "2.5")),
+    process_message,
+    ThreadPoolExecutor(max_workers=MAX_CONCURRENT_EVENTS)
+)
+
 @app.event("app_mention")
 def handle_mention(event, say, client):
     """Handle when the bot is mentioned"""
     try:
-        logger.info(f"Received mention event: {event}")
+        logger.info("Received mention event: %s", event)
         # Get thread_ts from the event, fallback to event ts if not in a thread
         thread_ts = event.get('thread_ts', event.get('ts'))
-        process_message(event, say, client, thread_ts=thread_ts)
+        event_coalescer.submit(event, say, client, thread_ts=thread_ts)
     except Exception as e:
-        logger.error(f"Error handling mention: {str(e)}")
+        logger.error("Error handling mention: %s", e)
         logger.error(traceback.format_exc())
         thread_ts = event.get('thread_ts', event.get('ts'))
         say(f"Sorry, I encountered an error: {str(e)}", thread_ts=thread_ts)
@@ -485,7 +590,7 @@ def handle_mention(event, say, client):
 def handle_message(message, say, client):
     """Handle direct messages to the bot"""
     try:
-        logger.info(f"Received message event: {message}")
+        logger.info("Received message event: %s", message)
         
         # Skip messages from the bot itself
         if message.get('bot_id'):
@@ -499,57 +604,52 @@ def handle_message(message, say, client):
         # Only process direct messages
         is_dm = message.get('channel_type') == 'im'
         
-        logger.info(f"Message type - DM: {is_dm}")
+        logger.info("Message type - DM: %s", is_dm)
         
         # Process only direct messages
         if is_dm:
             logger.info("Processing direct message")
             # Get thread_ts from the message, fallback to message ts if not in a thread
             thread_ts = message.get('thread_ts', message.get('ts'))
-            process_message(message, say, client, thread_ts=thread_ts)
+            event_coalescer.submit(message, say, client, thread_ts=thread_ts)
         else:
-            logger.info(f"Skipping message - not a DM. Channel type: {message.get('channel_type')}")
+            logger.info("Skipping message - not a DM. Channel type: %s", message.get('channel_type'))
         
     except Exception as e:
-        logger.error(f"Error handling message: {str(e)}")
+        logger.error("Error handling message: %s", e)
         logger.error(traceback.format_exc())
         thread_ts = message.get('thread_ts', message.get('ts'))
         say(f"Sorry, I encountered an error: {str(e)}", thread_ts=thread_ts)
 
 def main():
     """Main entry point"""
-    global active_handler
+    global active_handler, lock_fd
     
     try:
         # Test Slack connection first
         sys.stdout.write("\nTesting Slack connection...\n")
         sys.stdout.flush()
-        if test_slack_connection(os.environ.get("SLACK_BOT_TOKEN")):
+        if test_slack_connection(SLACK_BOT_TOKEN):
             sys.stdout.write("✓ Slack connection test successful\n")
             sys.stdout.flush()
         
-        # Check for existing lock file
-        pid_file = "/tmp/slack_analyzer.pid"
-        if os.path.exists(pid_file):
-            with open(pid_file, 'r') as f:
-                old_pid = int(f.read().strip())
-                try:
-                    # Check if process is still running
-                    os.kill(old_pid, 0)
-                    logger.error(f"Another instance is already running with PID {old_pid}")
-                    sys.exit(1)
-                except OSError:
-                    # Process not running, we can proceed
-                    pass
+        # Ensure only one instance runs
+        lock_fd = os.open("/tmp/slack_analyzer.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.error("Another instance is already running (lock held on /tmp/slack_analyzer.lock)")
+            sys.exit(1)
         
-        # Write our PID
-        with open(pid_file, 'w') as f:
-            f.write(str(os.getpid()))
+        # Record our PID for operators; the lock itself is what guards startup
+        os.ftruncate(lock_fd, 0)
+        os.write(lock_fd, str(os.getpid()).encode())
 
         # Initialize the handler with custom session
         active_handler = SocketModeHandler(
             app=app,
-            app_token=os.environ.get("SLACK_APP_TOKEN")
+            app_token=SLACK_APP_TOKEN,
+            concurrency=MAX_CONCURRENT_EVENTS
         )
         
         sys.stdout.write("\nStarting Slack bot...\n")
@@ -560,7 +660,7 @@ def main():
         except KeyboardInterrupt:
             logger.info("Exiting gracefully due to keyboard interrupt.")
         except Exception as e:
-            logger.error(f"Error during bot execution: {e}")
+            logger.error("Error during bot execution: %s", e)
 
         # Check should_exit flag after handler completion
         if should_exit:
@@ -572,7 +672,7 @@ def main():
         sys.stdout.flush()
 
     except Exception as e:
-        logger.error(f"Error starting bot: {str(e)}")
+        logger.error("Error starting bot: %s", e)
         logger.error(traceback.format_exc())
         cleanup()
         raise
@@ -1,3 +1,7 @@
+import functools
+
+
+@functools.lru_cache(maxsize=256)
 def create_analysis_prompt(system_name: str, app_input: str) -> str:
     """Create a prompt for security analysis that focuses on the specific input"""
     return f"""